@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, insert, delete, distinct, lambda_stmt
+from typing import List, Optional
+from datetime import datetime, timezone
 from uuid import UUID
 import uuid
 
+from app.core.cache import cached, invalidate
 from app.db.database import get_db
 from app.models.chat import ChatMessage
 from app.schemas.chat import ChatMessageCreate, ChatMessageResponse, ChatHistory
 
 router = APIRouter()
 
+SESSIONS_STMT = select(distinct(ChatMessage.session_id))
+
 
 @router.post("/messages", response_model=ChatMessageResponse)
 async def create_message(
@@ -18,33 +22,54 @@ async def create_message(
     db: AsyncSession = Depends(get_db),
 ):
     """Save a chat message."""
-    db_message = ChatMessage(
-        session_id=message.session_id,
-        role=message.role,
-        content=message.content,
-        workflow_id=message.workflow_id,
-        metadata=message.metadata,
+    result = await db.execute(
+        insert(ChatMessage)
+        .values(
+            session_id=message.session_id,
+            role=message.role,
+            content=message.content,
+            workflow_id=message.workflow_id,
+            meta_info=message.metadata,
+        )
+        .returning(ChatMessage)
     )
-
-    db.add(db_message)
+    db_message = result.scalar_one()
     await db.commit()
-    await db.refresh(db_message)
+    await invalidate("list_sessions")
 
     return db_message
 
 
-@router.get("/sessions/{session_id}", response_model=ChatHistory)
+@router.get(
+    "/sessions/{session_id}",
+    response_model=ChatHistory,
+    response_model_exclude_unset=True,
+)
 async def get_chat_history(
     session_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get chat history for a session."""
-    result = await db.execute(
-        select(ChatMessage)
-        .where(ChatMessage.session_id == session_id)
-        .order_by(ChatMessage.created_at.asc())
+    """Get chat history for a session.
+
+    Returns the latest ``limit`` messages (older than ``before`` if given)
+    in chronological order.
+    """
+    # created_at is stored as naive UTC; asyncpg rejects aware comparisons
+    if before is not None and before.tzinfo:
+        before = before.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Lambda statements are built and cache-keyed once per code path
+    stmt = lambda_stmt(
+        lambda: select(ChatMessage).where(ChatMessage.session_id == session_id)
     )
-    messages = result.scalars().all()
+    if before:
+        stmt += lambda s: s.where(ChatMessage.created_at < before)
+    stmt += lambda s: s.order_by(ChatMessage.created_at.desc()).limit(limit)
+
+    messages = [message async for message in await db.stream_scalars(stmt)]
+    messages.reverse()
 
     return ChatHistory(messages=messages, session_id=session_id)
 
@@ -55,27 +80,22 @@ async def clear_chat_history(
     db: AsyncSession = Depends(get_db),
 ):
     """Clear chat history for a session."""
-    result = await db.execute(
-        select(ChatMessage).where(ChatMessage.session_id == session_id)
+    await db.execute(
+        delete(ChatMessage)
+        .where(ChatMessage.session_id == session_id)
+        .execution_options(synchronize_session=False)
     )
-    messages = result.scalars().all()
-
-    for message in messages:
-        await db.delete(message)
-
     await db.commit()
+    await invalidate("list_sessions")
 
     return {"message": "Chat history cleared"}
 
 
-@router.get("/sessions", response_model=List[str])
+@router.get("/sessions", response_model=List[str], response_model_exclude_unset=True)
+@cached(ttl=30, response_type=List[str])
 async def list_sessions(db: AsyncSession = Depends(get_db)):
     """List all chat sessions."""
-    from sqlalchemy import distinct
-
-    result = await db.execute(
-        select(distinct(ChatMessage.session_id))
-    )
+    result = await db.execute(SESSIONS_STMT)
     sessions = [row[0] for row in result.fetchall()]
 
     return sessions
@@ -1,20 +1,46 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, BackgroundTasks
+import asyncio
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
+from app.core.cache import cached, invalidate
+from app.core.config import settings
 from app.db.database import get_db
 from app.services.document import DocumentService
+from app.services.embedding import EmbeddingService, get_embedding_service
 from app.schemas.document import DocumentResponse, DocumentList
+from app.worker import process_document_task, run_document_processing
 
 router = APIRouter()
 
 
+def get_document_service(
+    db: AsyncSession = Depends(get_db),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+) -> DocumentService:
+    """Build a document service on the request's session and the shared embedding service."""
+    return DocumentService(db, embedding_service)
+
+
+async def schedule_processing(background_tasks: BackgroundTasks, document_id: str):
+    """Queue document processing on the Celery worker.
+
+    Falls back to an in-process background task when no broker is configured.
+    """
+    if settings.REDIS_URL:
+        # The broker publish is blocking; keep a slow Redis off the loop
+        await asyncio.to_thread(process_document_task.delay, document_id)
+    else:
+        background_tasks.add_task(run_document_processing, document_id)
+
+
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
+    service: DocumentService = Depends(get_document_service),
 ):
     """Upload a document and process it in the background."""
     # Validate file type
@@ -25,49 +51,39 @@ async def upload_document(
             detail=f"File type not allowed. Allowed types: PDF, DOCX"
         )
 
-    service = DocumentService(db)
-
     # Upload document
-    document = await service.upload_document(file)
+    try:
+        document = await service.upload_document(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await invalidate("list_documents")
 
     # Process in background
-    background_tasks.add_task(
-        process_document_task,
-        document_id=str(document.id),
-        db_url=str(db.bind.url) if db.bind else None,
-    )
+    await schedule_processing(background_tasks, str(document.id))
 
     return document
 
 
-async def process_document_task(document_id: str, db_url: str = None):
-    """Background task to process document."""
-    from app.db.database import AsyncSessionLocal
-
-    async with AsyncSessionLocal() as db:
-        service = DocumentService(db)
-        try:
-            await service.process_document(document_id)
-        except Exception as e:
-            print(f"Error processing document {document_id}: {e}")
-
-
-@router.get("", response_model=DocumentList)
-async def list_documents(db: AsyncSession = Depends(get_db)):
-    """List all documents."""
-    service = DocumentService(db)
-    documents = await service.get_all_documents()
-    return DocumentList(documents=documents, total=len(documents))
+@router.get("", response_model=DocumentList, response_model_exclude_unset=True)
+@cached(ttl=60, response_type=DocumentList)
+async def list_documents(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    service: DocumentService = Depends(get_document_service),
+):
+    """List documents, newest first."""
+    documents = await service.get_all_documents(limit=limit, offset=offset)
+    total = await service.count_documents()
+    return DocumentList(documents=documents, total=total)
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    service: DocumentService = Depends(get_document_service),
 ):
     """Get a document by ID."""
-    service = DocumentService(db)
-    document = await service.get_document(str(document_id))
+    document = await service.get_document(document_id)
 
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -78,15 +94,16 @@ async def get_document(
 @router.delete("/{document_id}")
 async def delete_document(
     document_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    service: DocumentService = Depends(get_document_service),
 ):
     """Delete a document."""
-    service = DocumentService(db)
-    success = await service.delete_document(str(document_id))
+    success = await service.delete_document(document_id)
 
     if not success:
         raise HTTPException(status_code=404, detail="Document not found")
 
+    await invalidate("list_documents", f"knowledge:{document_id}")
+
     return {"message": "Document deleted successfully"}
 
 
@@ -94,19 +111,15 @@ async def delete_document(
 async def reprocess_document(
     document_id: UUID,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
+    service: DocumentService = Depends(get_document_service),
 ):
     """Reprocess a document."""
-    service = DocumentService(db)
-    document = await service.get_document(str(document_id))
+    document = await service.get_document(document_id)
 
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Process in background
-    background_tasks.add_task(
-        process_document_task,
-        document_id=str(document_id),
-    )
+    await schedule_processing(background_tasks, str(document_id))
 
     return document
@@ -1,16 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.services.llm import LLMService
+from app.services.llm import LLMService, get_llm_service
 from app.schemas.llm import LLMRequest, LLMResponse
 
 router = APIRouter()
 
 
 @router.post("/generate", response_model=LLMResponse)
-async def generate_response(request: LLMRequest):
+async def generate_response(
+    request: LLMRequest,
+    service: LLMService = Depends(get_llm_service),
+):
     """Generate a response using the specified LLM."""
-    service = LLMService()
-
     result = await service.generate(
         query=request.query,
         context=request.context,
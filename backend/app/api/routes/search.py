@@ -1,8 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from typing import Optional, List
+import hashlib
 
-from app.services.search import WebSearchService
-from app.services.embedding import EmbeddingService
+from app.core.cache import cache_get, cache_set
+from app.services.search import WebSearchService, get_search_service
+from app.services.embedding import EmbeddingService, get_embedding_service
 from app.schemas.search import (
     WebSearchRequest,
     WebSearchResponse,
@@ -14,12 +16,15 @@ from app.schemas.search import (
 
 router = APIRouter()
 
+KNOWLEDGE_CACHE_TTL = 600  # seconds
+
 
 @router.post("/web", response_model=WebSearchResponse)
-async def web_search(request: WebSearchRequest):
+async def web_search(
+    request: WebSearchRequest,
+    service: WebSearchService = Depends(get_search_service),
+):
     """Perform a web search."""
-    service = WebSearchService()
-
     result = await service.search(
         query=request.query,
         num_results=request.num_results,
@@ -34,9 +39,17 @@ async def web_search(request: WebSearchRequest):
 
 
 @router.post("/knowledge", response_model=KnowledgeSearchResponse)
-async def knowledge_search(request: KnowledgeSearchRequest):
+async def knowledge_search(
+    request: KnowledgeSearchRequest,
+    service: EmbeddingService = Depends(get_embedding_service),
+):
     """Search in the knowledge base (vector store)."""
-    service = EmbeddingService()
+    key = "ks:" + hashlib.blake2b(
+        f"{request.query}|{sorted(request.document_ids or [])}|{request.top_k}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    if (hit := await cache_get(key)) is not None:
+        return KnowledgeSearchResponse.model_validate_json(hit)
 
     try:
         results = await service.search_similar(
@@ -45,7 +58,7 @@ async def knowledge_search(request: KnowledgeSearchRequest):
             top_k=request.top_k,
         )
 
-        return KnowledgeSearchResponse(
+        response = KnowledgeSearchResponse(
             success=True,
             results=[
                 KnowledgeSearchResult(
@@ -62,3 +75,13 @@ async def knowledge_search(request: KnowledgeSearchRequest):
             success=False,
             error=str(e),
         )
+
+    # Tag by document so deletes and reprocessing drop stale entries;
+    # unfiltered searches can also change when any new document lands.
+    tags = {f"knowledge:{r.document_id}" for r in response.results}
+    tags.update(f"knowledge:{doc_id}" for doc_id in request.document_ids or [])
+    if not request.document_ids:
+        tags.add("knowledge")
+    await cache_set(key, response.model_dump_json(), KNOWLEDGE_CACHE_TTL, tags=tags)
+
+    return response
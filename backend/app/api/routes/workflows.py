@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, lambda_stmt
 from typing import List, Optional
 from uuid import UUID
 
 from app.db.database import get_db
-from app.services.workflow import WorkflowExecutor
+from app.services.workflow import WorkflowExecutor, get_workflow_executor
 from app.schemas.workflow import (
     WorkflowCreate,
     WorkflowResponse,
@@ -17,19 +21,82 @@ from app.models.workflow import Workflow
 
 router = APIRouter()
 
+# Columns returned by listings; the definition is only loaded on request
+WORKFLOW_SUMMARY_COLUMNS = (
+    Workflow.id,
+    Workflow.name,
+    Workflow.description,
+    Workflow.is_valid,
+    Workflow.created_at,
+    Workflow.updated_at,
+)
+
+LIST_WORKFLOWS_STMT = select(*WORKFLOW_SUMMARY_COLUMNS).order_by(Workflow.created_at.desc())
+LIST_WORKFLOWS_FULL_STMT = select(Workflow).order_by(Workflow.created_at.desc())
+
+
+def validate_definition(definition: WorkflowDefinition) -> WorkflowValidation:
+    """Validate a workflow definition; the executor memoizes unchanged graphs."""
+    return get_workflow_executor().validate_workflow(definition)
+
 
 @router.post("/validate", response_model=WorkflowValidation)
 async def validate_workflow(workflow: WorkflowDefinition):
     """Validate a workflow structure."""
-    executor = WorkflowExecutor()
-    return executor.validate_workflow(workflow)
+    return validate_definition(workflow)
+
+
+async def _wait_for_disconnect(http_request: Request):
+    """Return once the client has gone away."""
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
 
 
 @router.post("/execute", response_model=WorkflowExecuteResponse)
-async def execute_workflow(request: WorkflowExecute):
-    """Execute a workflow with a user query."""
-    executor = WorkflowExecutor()
-    return await executor.execute(request.workflow, request.query)
+async def execute_workflow(
+    request: WorkflowExecute,
+    http_request: Request,
+    executor: WorkflowExecutor = Depends(get_workflow_executor),
+):
+    """Execute a workflow with a user query.
+
+    If the client disconnects first, the execution and its in-flight
+    provider calls are cancelled.
+    """
+    execution = asyncio.create_task(executor.execute(request.workflow, request.query))
+    disconnect = asyncio.create_task(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({execution, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (execution, disconnect):
+            task.cancel()
+        await asyncio.gather(execution, disconnect, return_exceptions=True)
+
+    if execution.cancelled():
+        return WorkflowExecuteResponse(success=False, error="Client disconnected")
+    return execution.result()
+
+
+@router.post("/execute/stream")
+async def execute_workflow_stream(
+    request: WorkflowExecute,
+    executor: WorkflowExecutor = Depends(get_workflow_executor),
+):
+    """Execute a workflow, streaming steps and LLM tokens as NDJSON.
+
+    The last line is a ``result`` event with the full execution response.
+    """
+    async def lines():
+        async for event in executor.execute_stream(request.workflow, request.query):
+            yield event.model_dump_json(exclude_none=True) + "\n"
+
+    # GZipMiddleware buffers the body until the run ends; an explicit
+    # encoding makes it pass the events through as they are produced
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
+    )
 
 
 @router.post("", response_model=WorkflowResponse)
@@ -38,36 +105,38 @@ async def create_workflow(
     db: AsyncSession = Depends(get_db),
 ):
     """Save a workflow to the database."""
-    executor = WorkflowExecutor()
-
     # Validate first
-    validation = executor.validate_workflow(workflow.definition)
-
-    # Create workflow record
-    db_workflow = Workflow(
-        name=workflow.name,
-        description=workflow.description,
-        definition=workflow.definition.model_dump(),
-        is_valid=validation.valid,
-    )
-
-    db.add(db_workflow)
-    await db.commit()
-    await db.refresh(db_workflow)
+    validation = validate_definition(workflow.definition)
+
+    # Create workflow record; RETURNING saves a refresh round-trip
+    async with db.begin():
+        result = await db.execute(
+            insert(Workflow)
+            .values(
+                name=workflow.name,
+                description=workflow.description,
+                definition=workflow.definition.model_dump(),
+                is_valid=validation.valid,
+            )
+            .returning(Workflow)
+        )
+        db_workflow = result.scalar_one()
 
     return db_workflow
 
 
-@router.get("", response_model=List[WorkflowResponse])
-async def list_workflows(db: AsyncSession = Depends(get_db)):
+@router.get("", response_model=List[WorkflowResponse], response_model_exclude_unset=True)
+async def list_workflows(
+    include: Optional[str] = Query(None, description="Set to 'definition' to include workflow definitions"),
+    db: AsyncSession = Depends(get_db),
+):
     """List all saved workflows."""
-    from sqlalchemy import select
+    if include == "definition":
+        result = await db.execute(LIST_WORKFLOWS_FULL_STMT)
+        return result.scalars().all()
 
-    result = await db.execute(
-        select(Workflow).order_by(Workflow.created_at.desc())
-    )
-    workflows = result.scalars().all()
-    return workflows
+    result = await db.execute(LIST_WORKFLOWS_STMT)
+    return result.all()
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
@@ -76,10 +145,8 @@ async def get_workflow(
     db: AsyncSession = Depends(get_db),
 ):
     """Get a workflow by ID."""
-    from sqlalchemy import select
-
     result = await db.execute(
-        select(Workflow).where(Workflow.id == workflow_id)
+        lambda_stmt(lambda: select(Workflow).where(Workflow.id == workflow_id))
     )
     workflow = result.scalar_one_or_none()
 
@@ -96,26 +163,26 @@ async def update_workflow(
     db: AsyncSession = Depends(get_db),
 ):
     """Update a workflow."""
-    from sqlalchemy import select
+    validation = validate_definition(workflow.definition)
 
+    # Existence check and update in one round-trip
     result = await db.execute(
-        select(Workflow).where(Workflow.id == workflow_id)
+        update(Workflow)
+        .where(Workflow.id == workflow_id)
+        .values(
+            name=workflow.name,
+            description=workflow.description,
+            definition=workflow.definition.model_dump(),
+            is_valid=validation.valid,
+        )
+        .returning(Workflow)
     )
     db_workflow = result.scalar_one_or_none()
 
     if not db_workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    executor = WorkflowExecutor()
-    validation = executor.validate_workflow(workflow.definition)
-
-    db_workflow.name = workflow.name
-    db_workflow.description = workflow.description
-    db_workflow.definition = workflow.definition.model_dump()
-    db_workflow.is_valid = validation.valid
-
     await db.commit()
-    await db.refresh(db_workflow)
 
     return db_workflow
 
@@ -126,17 +193,13 @@ async def delete_workflow(
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a workflow."""
-    from sqlalchemy import select
-
     result = await db.execute(
-        select(Workflow).where(Workflow.id == workflow_id)
+        delete(Workflow).where(Workflow.id == workflow_id).returning(Workflow.id)
     )
-    workflow = result.scalar_one_or_none()
 
-    if not workflow:
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    await db.delete(workflow)
     await db.commit()
 
     return {"message": "Workflow deleted successfully"}
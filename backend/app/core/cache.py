@@ -0,0 +1,118 @@
+import functools
+import hashlib
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+_KEY_TYPES = (str, int, float, bool, type(None), UUID, datetime)
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Get the shared Redis client, or None if caching is disabled."""
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        # Short timeouts so an unreachable Redis degrades to cache misses
+        # instead of waiting out the OS TCP timeout
+        _client = redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_TIMEOUT,
+            socket_timeout=settings.REDIS_TIMEOUT,
+        )
+    return _client
+
+
+async def close_redis():
+    """Close the shared Redis client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Get a cached value. Redis errors are treated as a miss."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return await client.get(key)
+    except redis.RedisError:
+        return None
+
+
+async def cache_set(
+    key: str, value: Any, ttl: int, tags: Iterable[str] = ()
+) -> None:
+    """Cache a value and register its key under the given invalidation tags."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, value)
+            for tag in tags:
+                pipe.sadd(f"tag:{tag}", key)
+                pipe.expire(f"tag:{tag}", ttl)
+            await pipe.execute()
+    except redis.RedisError:
+        pass
+
+
+async def invalidate(*tags: str) -> None:
+    """Delete every cached value registered under the given tags."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        for tag in tags:
+            tag_key = f"tag:{tag}"
+            keys = await client.smembers(tag_key)
+            await client.delete(tag_key, *keys)
+    except redis.RedisError:
+        pass
+
+
+def cached(ttl: int, response_type: Any, tag: Optional[str] = None):
+    """Cache an async route's result in Redis.
+
+    The key is built from the function name and its plain-valued keyword
+    arguments; injected dependencies such as the DB session are skipped.
+    Entries are tagged with ``tag`` (default: the function name) so writers
+    can drop them with ``invalidate``.
+    """
+    adapter = TypeAdapter(response_type)
+
+    def decorator(func: Callable):
+        name = tag or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if get_redis() is None:
+                return await func(*args, **kwargs)
+
+            params = sorted(
+                (k, str(v)) for k, v in kwargs.items() if isinstance(v, _KEY_TYPES)
+            )
+            digest = hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest()
+            key = f"cache:{name}:{digest}"
+
+            hit = await cache_get(key)
+            if hit is not None:
+                return adapter.validate_json(hit)
+
+            result = await func(*args, **kwargs)
+            await cache_set(key, adapter.dump_json(result), ttl, tags=(name,))
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,15 @@
+import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.cache import close_redis
 from app.db.database import init_db
+from app.services import close_services
+from app.services.document import shutdown_extract_pool
 from app.api.routes import api_router
 
 
@@ -11,10 +17,14 @@ from app.api.routes import api_router
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     await init_db()
     print("Database initialized")
     yield
     # Shutdown
+    await close_services()
+    shutdown_extract_pool()
+    await close_redis()
     print("Shutting down")
 
 
@@ -23,6 +33,7 @@ app = FastAPI(
     description="API for the No-Code/Low-Code AI Workflow Builder",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -34,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (document, workflow and chat listings)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,13 +9,17 @@ from app.db.database import Base
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Serves both history reads and session deletes
+        Index("ix_chat_session_created", "session_id", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id"), nullable=True)
+    workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id"), nullable=True, index=True)
     session_id = Column(String(100), nullable=False)  # For grouping messages
     role = Column(String(20), nullable=False)  # user, assistant, system
     content = Column(Text, nullable=False)
-    meta_info = Column(JSON, nullable=True)  # Execution details, timings, etc.
+    meta_info = Column(JSONB, nullable=True)  # Execution details, timings, etc.
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
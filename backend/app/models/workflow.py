@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Text, Boolean
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from datetime import datetime
 import uuid
 
@@ -12,7 +12,7 @@ class Workflow(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    definition = Column(JSON, nullable=False)  # Stores nodes and edges
+    definition = Column(JSONB, nullable=False)  # Stores nodes and edges
     is_valid = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
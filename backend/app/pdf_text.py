@@ -0,0 +1,29 @@
+"""PDF text extraction run inside extraction worker processes.
+
+Spawned workers import this module to unpickle their task, so it depends
+on PyMuPDF alone; importing ``app.services`` would load every client SDK
+into each child.
+"""
+from typing import List
+
+import fitz  # PyMuPDF
+
+# Plain text without image blocks, with words hyphenated across line
+# breaks joined back together; layout sorting stays off
+TEXT_FLAGS = (fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES) | fitz.TEXT_DEHYPHENATE
+
+
+def extract_pages(doc: fitz.Document, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of an open PDF."""
+    parts = []
+    for i in range(start, end):
+        page = doc.load_page(i)
+        parts.append(page.get_text("text", flags=TEXT_FLAGS, sort=False))
+        page = None  # Release the page before loading the next one
+    return parts
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF file."""
+    with fitz.open(file_path) as doc:
+        return extract_pages(doc, start, end)
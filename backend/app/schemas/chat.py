@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -13,17 +13,17 @@ class ChatMessageCreate(BaseModel):
 
 
 class ChatMessageResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
     id: UUID
     session_id: str
     role: str
     content: str
     workflow_id: Optional[UUID]
-    metadata: Optional[Dict[str, Any]]
+    # Stored as ChatMessage.meta_info; "metadata" is reserved on ORM models
+    metadata: Optional[Dict[str, Any]] = Field(default=None, validation_alias="meta_info")
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class ChatHistory(BaseModel):
     messages: List[ChatMessageResponse]
@@ -63,7 +63,7 @@ class WorkflowResponse(BaseModel):
     id: UUID
     name: str
     description: Optional[str]
-    definition: Dict[str, Any]
+    definition: Optional[Dict[str, Any]] = None  # Omitted from listings unless requested
     is_valid: bool
     created_at: datetime
     updated_at: datetime
@@ -104,3 +104,17 @@ class WorkflowExecuteResponse(BaseModel):
     error: Optional[str] = None
     steps: List[ExecutionStep] = []
     total_duration_ms: int = 0
+
+
+class WorkflowEvent(BaseModel):
+    """One line of a streamed workflow execution.
+
+    ``step`` events report finished components, ``token`` events carry LLM
+    text deltas as they are generated, and a final ``result`` event holds
+    the same response the non-streaming endpoint returns.
+    """
+    event: Literal["step", "token", "result"]
+    node_id: Optional[str] = None
+    delta: Optional[str] = None
+    step: Optional[ExecutionStep] = None
+    result: Optional[WorkflowExecuteResponse] = None
@@ -1,8 +1,18 @@
 from .document import DocumentService
-from .embedding import EmbeddingService
-from .llm import LLMService
-from .search import WebSearchService
-from .workflow import WorkflowExecutor
+from .embedding import EmbeddingService, get_embedding_service
+from .llm import LLMService, get_llm_service
+from .search import WebSearchService, get_search_service
+from .workflow import WorkflowExecutor, get_workflow_executor
+
+
+async def close_services():
+    """Close clients held by the shared service instances."""
+    for factory in (get_embedding_service, get_llm_service, get_search_service):
+        if factory.cache_info().currsize:
+            await factory().aclose()
+        factory.cache_clear()
+    get_workflow_executor.cache_clear()
+
 
 __all__ = [
     "DocumentService",
@@ -10,4 +20,9 @@ __all__ = [
     "LLMService",
     "WebSearchService",
     "WorkflowExecutor",
+    "get_embedding_service",
+    "get_llm_service",
+    "get_search_service",
+    "get_workflow_executor",
+    "close_services",
 ]
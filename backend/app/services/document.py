@@ -1,20 +1,109 @@
+import asyncio
+import contextlib
 import os
 import uuid
+import itertools
+import multiprocessing
+import threading
+import aiofiles
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Optional
 from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select, func
+from sqlalchemy.orm import load_only
 
 from app.models.document import Document, DocumentStatus
+from app.pdf_text import extract_page_range, extract_pages
 from app.core.config import settings
 from app.services.embedding import EmbeddingService
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+# Leading bytes expected for each accepted content type
+FILE_SIGNATURES = {
+    "application/pdf": b"%PDF",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": b"PK\x03\x04",
+}
+
+# PDFs with at least this many pages are split across worker processes
+PARALLEL_EXTRACT_MIN_PAGES = 32
+
+# Columns returned by document listings (everything but the storage path)
+LISTING_COLUMNS = (
+    Document.id,
+    Document.filename,
+    Document.original_filename,
+    Document.file_size,
+    Document.mime_type,
+    Document.status,
+    Document.chunk_count,
+    Document.error_message,
+    Document.created_at,
+    Document.updated_at,
+)
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+# Extraction runs in to_thread workers, so concurrent uploads race to create it
+_extract_pool_lock = threading.Lock()
+
+
+def _extract_worker_count() -> int:
+    """Number of extraction processes, capped by the CPUs this process may use."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+    return max(1, min(settings.PDF_EXTRACT_MAX_WORKERS, cpus))
+
+
+def _get_extract_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared extraction pool, or None where it should not be used."""
+    global _extract_pool
+    # Celery prefork children are daemonic and cannot start processes
+    if multiprocessing.current_process().daemon:
+        return None
+    if _extract_worker_count() < 2:
+        return None
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=_extract_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extract_pool
+
+
+def _discard_extract_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next large PDF starts a fresh one."""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_extract_pool():
+    """Stop the extraction pool's processes, if it was started."""
+    global _extract_pool
+    with _extract_pool_lock:
+        pool, _extract_pool = _extract_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _remove_file(file_path: str):
+    """Remove a file if it still exists."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(file_path)
+
 
 class DocumentService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, embedding_service: EmbeddingService):
         self.db = db
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = embedding_service
 
     async def upload_document(self, file: UploadFile) -> Document:
         """Upload and save a document."""
@@ -23,28 +112,43 @@ class DocumentService:
         unique_filename = f"{uuid.uuid4()}{file_ext}"
         file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
 
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream to disk, checking the file signature on the first chunk
+        signature = FILE_SIGNATURES.get(file.content_type, b"%PDF")
+        file_size = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    if file_size == 0 and not chunk.startswith(signature):
+                        raise ValueError("File content does not match its declared type")
+                    file_size += len(chunk)
+                    if file_size > settings.MAX_FILE_SIZE:
+                        raise ValueError(
+                            f"File exceeds the maximum size of {settings.MAX_FILE_SIZE // (1024 * 1024)}MB"
+                        )
+                    await f.write(chunk)
+            if file_size == 0:
+                raise ValueError("Uploaded file is empty")
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
 
         # Create document record
         document = Document(
             filename=unique_filename,
             original_filename=file.filename,
             file_path=file_path,
-            file_size=len(content),
+            file_size=file_size,
             mime_type=file.content_type or "application/pdf",
             status=DocumentStatus.PENDING,
         )
 
         self.db.add(document)
         await self.db.commit()
-        await self.db.refresh(document)
 
         return document
 
-    async def process_document(self, document_id: str) -> Document:
+    async def process_document(self, document_id: uuid.UUID) -> Document:
         """Process a document: extract text, create chunks, and generate embeddings."""
         # Get document
         result = await self.db.execute(
@@ -60,11 +164,9 @@ class DocumentService:
             document.status = DocumentStatus.PROCESSING
             await self.db.commit()
 
-            # Extract text
-            text = self._extract_text(document.file_path)
-
-            # Create chunks
-            chunks = self._create_chunks(text)
+            # Extract text and chunk it off the event loop
+            text = await asyncio.to_thread(self._extract_text, document.file_path)
+            chunks = await asyncio.to_thread(self._create_chunks, text)
 
             # Generate embeddings and store in ChromaDB
             chunk_count = await self.embedding_service.store_document_chunks(
@@ -77,7 +179,6 @@ class DocumentService:
             document.status = DocumentStatus.READY
             document.chunk_count = chunk_count
             await self.db.commit()
-            await self.db.refresh(document)
 
             return document
 
@@ -88,16 +189,36 @@ class DocumentService:
             raise
 
     def _extract_text(self, file_path: str) -> str:
-        """Extract text from PDF using PyMuPDF."""
-        text = ""
+        """Extract text from PDF using PyMuPDF.
+
+        Large PDFs are split into page ranges extracted in parallel processes.
+        If the pool breaks (a worker was killed or crashed), it is discarded
+        and the file is extracted serially.
+        """
         try:
-            doc = fitz.open(file_path)
-            for page in doc:
-                text += page.get_text()
-            doc.close()
+            with fitz.open(file_path) as doc:
+                page_count = doc.page_count
+                pool = None
+                if page_count >= PARALLEL_EXTRACT_MIN_PAGES:
+                    pool = _get_extract_pool()
+                if pool is None:
+                    # Reuse this handle rather than reopening
+                    return "".join(extract_pages(doc, 0, page_count))
+
+            step = -(-page_count // _extract_worker_count())
+            try:
+                futures = [
+                    pool.submit(extract_page_range, file_path, start, min(start + step, page_count))
+                    for start in range(0, page_count, step)
+                ]
+                parts = [future.result() for future in futures]
+            except BrokenProcessPool:
+                _discard_extract_pool(pool)
+                with fitz.open(file_path) as doc:
+                    return "".join(extract_pages(doc, 0, page_count))
         except Exception as e:
             raise ValueError(f"Failed to extract text: {str(e)}")
-        return text
+        return "".join(itertools.chain.from_iterable(parts))
 
     def _create_chunks(
         self, text: str, chunk_size: int = 1000, overlap: int = 200
@@ -120,7 +241,9 @@ class DocumentService:
                 if break_point == -1:
                     # Look for sentence break
                     break_point = text.rfind(". ", start, end)
-                if break_point != -1 and break_point > start:
+                # Only break where the next chunk still starts past this one;
+                # an earlier break would move ``start`` backwards and repeat
+                if break_point != -1 and break_point + 1 - overlap > start:
                     end = break_point + 1
 
             chunk = text[start:end].strip()
@@ -131,33 +254,50 @@ class DocumentService:
 
         return chunks
 
-    async def get_document(self, document_id: str) -> Optional[Document]:
+    async def get_document(self, document_id: uuid.UUID) -> Optional[Document]:
         """Get a document by ID."""
         result = await self.db.execute(
             select(Document).where(Document.id == document_id)
         )
         return result.scalar_one_or_none()
 
-    async def get_all_documents(self) -> List[Document]:
-        """Get all documents."""
-        result = await self.db.execute(select(Document).order_by(Document.created_at.desc()))
+    async def get_all_documents(self, limit: int = 50, offset: int = 0) -> List[Document]:
+        """Get a page of documents, newest first.
+
+        Only the columns shown in listings are loaded; ``file_path`` stays
+        server-side.
+        """
+        result = await self.db.execute(
+            select(Document)
+            .options(load_only(*LISTING_COLUMNS))
+            .order_by(Document.created_at.desc())
+            .limit(limit)
+            .offset(offset)
+        )
         return result.scalars().all()
 
-    async def delete_document(self, document_id: str) -> bool:
-        """Delete a document and its embeddings."""
-        document = await self.get_document(document_id)
-        if not document:
-            return False
+    async def count_documents(self) -> int:
+        """Count all documents."""
+        result = await self.db.execute(select(func.count()).select_from(Document))
+        return result.scalar_one()
 
-        # Delete from ChromaDB
-        await self.embedding_service.delete_document(document_id)
+    async def delete_document(self, document_id: uuid.UUID) -> bool:
+        """Delete a document, its file, and its embeddings."""
+        result = await self.db.execute(
+            delete(Document)
+            .where(Document.id == document_id)
+            .returning(Document.file_path)
+        )
+        file_path = result.scalar_one_or_none()
+        if file_path is None:
+            return False
 
-        # Delete file
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
+        # Drop embeddings and the stored file concurrently
+        await asyncio.gather(
+            self.embedding_service.delete_document(str(document_id)),
+            asyncio.to_thread(_remove_file, file_path),
+        )
 
-        # Delete from database
-        await self.db.delete(document)
         await self.db.commit()
 
         return True
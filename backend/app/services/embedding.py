@@ -1,12 +1,47 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import base64
+import numpy as np
 import openai
 import google.generativeai as genai
 import os
 
 from app.core.config import settings
 
+# Texts per embeddings request. OpenAI accepts up to 2048 inputs but caps a
+# request at ~300k tokens, which 1024 default-sized chunks stay under.
+OPENAI_EMBED_BATCH_SIZE = 1024
+# Maximum texts per Gemini batchEmbedContents request
+GEMINI_EMBED_BATCH_SIZE = 100
+# Embedding requests in flight at once per call
+EMBED_MAX_INFLIGHT = 8
+# Distinct chunks embedded and written to Chroma together during ingest
+INGEST_BATCH_SIZE = 256
+
+
+async def _batched(
+    texts: List[str],
+    size: int,
+    call: Callable[[List[str]], Awaitable[Any]],
+    concurrency: int = EMBED_MAX_INFLIGHT,
+) -> List[Any]:
+    """Run ``call`` over ``size``-long slices of ``texts`` concurrently.
+
+    Returns the per-batch results in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(batch: List[str]) -> List[Any]:
+        async with semaphore:
+            return await call(batch)
+
+    return await asyncio.gather(*[
+        one(texts[i:i + size]) for i in range(0, len(texts), size)
+    ])
+
 
 class EmbeddingService:
     def __init__(self):
@@ -31,11 +66,13 @@ class EmbeddingService:
                     allow_reset=True,
                 )
             )
+            self._tune_sqlite()
         self.collection_name = settings.CHROMA_COLLECTION_NAME
+        self._collection = None
 
         # Initialize OpenAI client
         if settings.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         else:
             self.openai_client = None
 
@@ -43,17 +80,40 @@ class EmbeddingService:
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
 
+    async def aclose(self):
+        """Release the underlying HTTP clients."""
+        if self.openai_client:
+            await self.openai_client.close()
+
+    def _tune_sqlite(self):
+        """Switch the local Chroma SQLite store to WAL with relaxed fsyncs.
+
+        Chroma does not expose these settings, so this reaches into its
+        connection pool and is skipped if the internals change.
+        """
+        try:
+            from chromadb.db.system import SysDB
+
+            conn = self.chroma_client._system.instance(SysDB)._conn_pool.connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+        except Exception as e:
+            print(f"Could not tune Chroma SQLite settings: {e}")
+
     def _get_or_create_collection(self):
-        """Get or create the ChromaDB collection."""
-        return self.chroma_client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        """Get or create the ChromaDB collection, reusing the cached handle."""
+        if self._collection is None:
+            self._collection = self.chroma_client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return self._collection
 
     async def generate_embeddings(
         self, texts: List[str], model: str = "openai"
-    ) -> List[List[float]]:
-        """Generate embeddings for a list of texts."""
+    ) -> np.ndarray:
+        """Generate float32 embeddings for a list of texts, one row per text."""
         if model == "openai":
             return await self._openai_embeddings(texts)
         elif model == "gemini":
@@ -61,31 +121,47 @@ class EmbeddingService:
         else:
             raise ValueError(f"Unknown embedding model: {model}")
 
-    async def _openai_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings using OpenAI."""
+    async def _openai_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings using OpenAI.
+
+        Vectors are requested base64-encoded and decoded straight into
+        float32 arrays, skipping per-float JSON parsing.
+        """
         if not self.openai_client:
             raise ValueError("OpenAI API key not configured")
 
-        response = self.openai_client.embeddings.create(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            input=texts,
-        )
-        return [item.embedding for item in response.data]
+        async def embed(batch: List[str]) -> np.ndarray:
+            response = await self.openai_client.embeddings.create(
+                model=settings.OPENAI_EMBEDDING_MODEL,
+                input=batch,
+                encoding_format="base64",
+            )
+            return np.stack([
+                np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+                for item in response.data
+            ])
 
-    async def _gemini_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings using Gemini."""
+        return np.concatenate(await _batched(texts, OPENAI_EMBED_BATCH_SIZE, embed))
+
+    async def _gemini_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings using Gemini, one batch request per 100 texts."""
         if not settings.GOOGLE_API_KEY:
             raise ValueError("Google API key not configured")
 
-        embeddings = []
-        for text in texts:
-            result = genai.embed_content(
+        async def embed(batch: List[str]) -> List[List[float]]:
+            result = await asyncio.to_thread(
+                genai.embed_content,
                 model="models/embedding-001",
-                content=text,
+                content=batch,
                 task_type="retrieval_document",
             )
-            embeddings.append(result["embedding"])
-        return embeddings
+            return result["embedding"]
+
+        results = await _batched(texts, GEMINI_EMBED_BATCH_SIZE, embed)
+        return np.asarray(
+            [embedding for result in results for embedding in result],
+            dtype=np.float32,
+        )
 
     async def store_document_chunks(
         self,
@@ -94,29 +170,67 @@ class EmbeddingService:
         chunks: List[str],
         model: str = "openai",
     ) -> int:
-        """Store document chunks with their embeddings in ChromaDB."""
+        """Store document chunks with their embeddings in ChromaDB.
+
+        Chunks are embedded in concurrent batches and each batch is inserted
+        as soon as it arrives, so Chroma writes overlap with the embedding
+        requests still in flight.
+        """
         if not chunks:
             return 0
 
         collection = self._get_or_create_collection()
 
-        # Generate embeddings
-        embeddings = await self.generate_embeddings(chunks, model)
-
-        # Prepare data for ChromaDB
-        ids = [f"{document_id}_{i}" for i in range(len(chunks))]
-        metadatas = [
-            {"document_id": document_id, "document_name": document_name, "chunk_index": i}
-            for i in range(len(chunks))
+        # Embed each distinct chunk once; repeats reuse its vector
+        occurrences: Dict[str, List[int]] = {}
+        for i, chunk in enumerate(chunks):
+            occurrences.setdefault(chunk, []).append(i)
+        unique_chunks = list(occurrences)
+        batches = [
+            unique_chunks[i:i + INGEST_BATCH_SIZE]
+            for i in range(0, len(unique_chunks), INGEST_BATCH_SIZE)
         ]
 
-        # Add to collection
-        collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=chunks,
-            metadatas=metadatas,
-        )
+        embedded: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(EMBED_MAX_INFLIGHT)
+
+        async def embed(batch: List[str]):
+            try:
+                async with semaphore:
+                    embeddings = await self.generate_embeddings(batch, model)
+                await embedded.put((batch, embeddings))
+            except Exception as e:
+                await embedded.put(e)
+
+        tasks = [asyncio.create_task(embed(batch)) for batch in batches]
+        try:
+            for _ in batches:
+                item = await embedded.get()
+                if isinstance(item, Exception):
+                    raise item
+                batch, embeddings = item
+                positions = [i for chunk in batch for i in occurrences[chunk]]
+                # Only repeated chunks need their rows copied out
+                if len(positions) > len(batch):
+                    embeddings = embeddings[
+                        [j for j, chunk in enumerate(batch) for _ in occurrences[chunk]]
+                    ]
+                await asyncio.to_thread(
+                    collection.add,
+                    ids=[f"{document_id}_{i}" for i in positions],
+                    embeddings=embeddings,
+                    documents=[chunks[i] for i in positions],
+                    metadatas=[
+                        {"document_id": document_id, "document_name": document_name, "chunk_index": i}
+                        for i in positions
+                    ],
+                )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            # Drop any batches already written so a retry starts clean
+            await asyncio.to_thread(collection.delete, where={"document_id": document_id})
+            raise
 
         return len(chunks)
 
@@ -128,18 +242,30 @@ class EmbeddingService:
         model: str = "openai",
     ) -> List[Dict[str, Any]]:
         """Search for similar chunks in ChromaDB."""
-        collection = self._get_or_create_collection()
+        query_embedding = await self.embed_query(query, model)
+        return await self.search_with_vector(query_embedding, document_ids, top_k)
 
-        # Generate query embedding
-        query_embedding = await self.generate_embeddings([query], model)
+    async def embed_query(self, query: str, model: str = "openai") -> np.ndarray:
+        """Embed a search query; returns a one-row float32 matrix."""
+        return await self.generate_embeddings([query], model)
+
+    async def search_with_vector(
+        self,
+        query_embedding: np.ndarray,
+        document_ids: Optional[List[str]] = None,
+        top_k: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """Search ChromaDB with an already computed query embedding."""
+        collection = self._get_or_create_collection()
 
         # Build where filter
         where_filter = None
         if document_ids:
             where_filter = {"document_id": {"$in": document_ids}}
 
-        # Search
-        results = collection.query(
+        # Search off the loop; the local client does HNSW and SQLite work inline
+        results = await asyncio.to_thread(
+            collection.query,
             query_embeddings=query_embedding,
             n_results=top_k,
             where=where_filter,
@@ -164,7 +290,13 @@ class EmbeddingService:
         try:
             collection = self._get_or_create_collection()
             # Delete by metadata filter
-            collection.delete(where={"document_id": document_id})
+            await asyncio.to_thread(collection.delete, where={"document_id": document_id})
             return True
         except Exception:
             return False
+
+
+@lru_cache(maxsize=1)
+def get_embedding_service() -> EmbeddingService:
+    """Get the shared embedding service instance."""
+    return EmbeddingService()
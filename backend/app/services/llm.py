@@ -1,15 +1,80 @@
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Callable, Optional, Dict, Any
+import asyncio
+import httpx
 import openai
 import google.generativeai as genai
+import tiktoken
 
 from app.core.config import settings
 
+# Context windows (in tokens) of the chat models offered in the builder
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-1.5-pro": 2_097_152,
+}
+DEFAULT_CONTEXT_TOKENS = 8_192
+# Room left for the system prompt, question and prompt template
+PROMPT_OVERHEAD_TOKENS = 512
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Get the tiktoken encoding for a model, or None if it cannot be loaded."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; fall back to estimating
+        print(f"Could not load tokenizer for {model}: {e}")
+        return None
+
+
+def _truncate_context(context: str, model: str, max_tokens: int) -> str:
+    """Trim retrieved context to fit the model's prompt budget.
+
+    OpenAI models are measured with tiktoken; other models, or a missing
+    tokenizer, fall back to ~4 characters per token. Tokenizing is CPU-bound
+    (and downloads the encoding on first use), so call this off the loop.
+    """
+    window = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    budget = min(
+        settings.LLM_MAX_CONTEXT_TOKENS,
+        window - max_tokens - PROMPT_OVERHEAD_TOKENS,
+    )
+    budget = max(budget, 0)
+
+    # Every token covers at least one byte
+    if len(context.encode()) <= budget:
+        return context
+
+    encoding = _get_encoding(model) if model.startswith("gpt-") else None
+    if encoding is None:
+        return context[:budget * 4]
+
+    tokens = encoding.encode(context, disallowed_special=())
+    if len(tokens) <= budget:
+        return context
+    return encoding.decode(tokens[:budget])
+
 
 class LLMService:
     def __init__(self):
         # Initialize OpenAI client
         if settings.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            # Concurrent completions from parallel LLM nodes are multiplexed
+            # over one HTTP/2 connection rather than one connection each
+            self.openai_client = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=httpx.AsyncClient(http2=True, timeout=openai.DEFAULT_TIMEOUT),
+            )
         else:
             self.openai_client = None
 
@@ -17,6 +82,11 @@ class LLMService:
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
 
+    async def aclose(self):
+        """Release the underlying HTTP clients."""
+        if self.openai_client:
+            await self.openai_client.close()
+
     async def generate(
         self,
         query: str,
@@ -26,15 +96,21 @@ class LLMService:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> Dict[str, Any]:
-        """Generate a response using the specified LLM."""
+        """Generate a response using the specified LLM.
+
+        If ``on_token`` is given the response is streamed and each text
+        delta is passed to it as it arrives; the full response is still
+        returned. Streamed responses carry no usage figures.
+        """
         if provider == "openai":
             return await self._generate_openai(
-                query, context, system_prompt, model, temperature, max_tokens
+                query, context, system_prompt, model, temperature, max_tokens, on_token
             )
         elif provider == "gemini":
             return await self._generate_gemini(
-                query, context, system_prompt, model, temperature, max_tokens
+                query, context, system_prompt, model, temperature, max_tokens, on_token
             )
         else:
             raise ValueError(f"Unknown LLM provider: {provider}")
@@ -47,12 +123,15 @@ class LLMService:
         model: Optional[str],
         temperature: float,
         max_tokens: int,
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> Dict[str, Any]:
         """Generate response using OpenAI."""
         if not self.openai_client:
             raise ValueError("OpenAI API key not configured")
 
         model = model or settings.OPENAI_CHAT_MODEL
+        if context:
+            context = await asyncio.to_thread(_truncate_context, context, model, max_tokens)
 
         # Build messages
         messages = []
@@ -81,7 +160,33 @@ Answer:"""
         messages.append({"role": "user", "content": user_content})
 
         try:
-            response = self.openai_client.chat.completions.create(
+            if on_token is not None:
+                stream = await self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                parts = []
+                # Closing the stream on exit (including cancellation) ends
+                # generation rather than leaving it running server-side
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            delta = chunk.choices[0].delta.content
+                            parts.append(delta)
+                            on_token(delta)
+
+                return {
+                    "success": True,
+                    "response": "".join(parts),
+                    "provider": "openai",
+                    "model": model,
+                    "usage": None,
+                }
+
+            response = await self.openai_client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
@@ -115,12 +220,17 @@ Answer:"""
         model: Optional[str],
         temperature: float,
         max_tokens: int,
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> Dict[str, Any]:
         """Generate response using Gemini."""
         if not settings.GOOGLE_API_KEY:
             raise ValueError("Google API key not configured")
 
         model_name = model or settings.GEMINI_MODEL
+        if context:
+            context = await asyncio.to_thread(
+                _truncate_context, context, model_name, max_tokens
+            )
 
         try:
             # Initialize model
@@ -149,11 +259,20 @@ Answer:"""
             else:
                 prompt += query
 
-            response = gemini_model.generate_content(prompt)
+            if on_token is not None:
+                response = await gemini_model.generate_content_async(prompt, stream=True)
+                parts = []
+                async for chunk in response:
+                    parts.append(chunk.text)
+                    on_token(chunk.text)
+                text = "".join(parts)
+            else:
+                response = await gemini_model.generate_content_async(prompt)
+                text = response.text
 
             return {
                 "success": True,
-                "response": response.text,
+                "response": text,
                 "provider": "gemini",
                 "model": model_name,
                 "usage": None,
@@ -165,3 +284,9 @@ Answer:"""
                 "provider": "gemini",
                 "model": model_name,
             }
+
+
+@lru_cache(maxsize=1)
+def get_llm_service() -> LLMService:
+    """Get the shared LLM service instance."""
+    return LLMService()
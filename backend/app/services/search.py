@@ -1,5 +1,7 @@
+from functools import lru_cache
 from typing import List, Dict, Any
 import httpx
+import orjson
 
 from app.core.config import settings
 
@@ -8,6 +10,16 @@ class WebSearchService:
     def __init__(self):
         self.serpapi_key = settings.SERPAPI_KEY
         self.brave_api_key = settings.BRAVE_API_KEY
+        # Shared pooled client so repeat searches reuse TLS connections
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+
+    async def aclose(self):
+        """Release the underlying HTTP client."""
+        await self.http_client.aclose()
 
     async def search(
         self,
@@ -35,19 +47,17 @@ class WebSearchService:
             }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://serpapi.com/search",
-                    params={
-                        "q": query,
-                        "api_key": self.serpapi_key,
-                        "num": num_results,
-                        "engine": "google",
-                    },
-                    timeout=30.0,
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self.http_client.get(
+                "https://serpapi.com/search",
+                params={
+                    "q": query,
+                    "api_key": self.serpapi_key,
+                    "num": num_results,
+                    "engine": "google",
+                },
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
 
             results = []
             for item in data.get("organic_results", [])[:num_results]:
@@ -80,21 +90,19 @@ class WebSearchService:
             }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.search.brave.com/res/v1/web/search",
-                    params={
-                        "q": query,
-                        "count": num_results,
-                    },
-                    headers={
-                        "X-Subscription-Token": self.brave_api_key,
-                        "Accept": "application/json",
-                    },
-                    timeout=30.0,
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self.http_client.get(
+                "https://api.search.brave.com/res/v1/web/search",
+                params={
+                    "q": query,
+                    "count": num_results,
+                },
+                headers={
+                    "X-Subscription-Token": self.brave_api_key,
+                    "Accept": "application/json",
+                },
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
 
             results = []
             for item in data.get("web", {}).get("results", [])[:num_results]:
@@ -131,3 +139,9 @@ class WebSearchService:
             )
 
         return "\n".join(context_parts)
+
+
+@lru_cache(maxsize=1)
+def get_search_service() -> WebSearchService:
+    """Get the shared web search service instance."""
+    return WebSearchService()
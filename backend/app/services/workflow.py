@@ -1,37 +1,139 @@
-from typing import Dict, Any, List, Optional
-from collections import defaultdict
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+import asyncio
+import hashlib
 import time
 
-from app.services.embedding import EmbeddingService
-from app.services.llm import LLMService
-from app.services.search import WebSearchService
+from app.core.config import settings
+from app.services.embedding import get_embedding_service
+from app.services.llm import get_llm_service
+from app.services.search import get_search_service
 from app.schemas.workflow import (
     WorkflowDefinition,
     WorkflowValidation,
     ValidationError,
     WorkflowExecuteResponse,
+    WorkflowEvent,
     ExecutionStep,
 )
 
+# Distinct workflow definitions whose graph index and validation are kept
+GRAPH_CACHE_SIZE = 256
+
+# Process-wide caps on in-flight calls to each external provider, shared
+# by every execution so concurrent workflows cannot burst past rate limits
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _provider_slot(provider: str) -> asyncio.Semaphore:
+    """Get the concurrency gate for an external provider."""
+    semaphore = _provider_semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.WORKFLOW_PROVIDER_CONCURRENCY)
+        _provider_semaphores[provider] = semaphore
+    return semaphore
+
+
+@dataclass
+class GraphIndex:
+    """Lookup tables for a workflow graph, built in one pass and shared by
+    validation, cycle detection and execution."""
+
+    node_map: Dict[str, Any]
+    type_counts: Counter
+    outgoing: Dict[str, List[str]]
+    incoming: Dict[str, List[str]]
+    in_degree: Dict[str, int]
+
+
+def _build_graph(workflow: WorkflowDefinition) -> GraphIndex:
+    """Index a workflow's nodes and edges."""
+    node_map = {}
+    type_counts = Counter()
+    in_degree = {}
+    for node in workflow.nodes:
+        node_map[node.id] = node
+        type_counts[node.data.type] += 1
+        in_degree[node.id] = 0
+
+    outgoing = defaultdict(list)
+    incoming = defaultdict(list)
+    for edge in workflow.edges:
+        outgoing[edge.source].append(edge.target)
+        incoming[edge.target].append(edge.source)
+        in_degree[edge.target] = in_degree.get(edge.target, 0) + 1
+
+    return GraphIndex(
+        node_map=node_map,
+        type_counts=type_counts,
+        outgoing=dict(outgoing),
+        incoming=dict(incoming),
+        in_degree=in_degree,
+    )
+
 
 class WorkflowExecutor:
     def __init__(self):
-        self.embedding_service = EmbeddingService()
-        self.llm_service = LLMService()
-        self.search_service = WebSearchService()
-
-    def validate_workflow(self, workflow: WorkflowDefinition) -> WorkflowValidation:
-        """Validate workflow structure and connections."""
+        self.embedding_service = get_embedding_service()
+        self.llm_service = get_llm_service()
+        self.search_service = get_search_service()
+        self._graph_cache: OrderedDict[bytes, Tuple[GraphIndex, WorkflowValidation]] = OrderedDict()
+        self._node_handlers = {
+            "userQuery": self._exec_user_query,
+            "knowledgeBase": self._exec_knowledge_base,
+            "llmEngine": self._exec_llm_engine,
+            "output": self._exec_output,
+        }
+
+    def validate_workflow(
+        self, workflow: WorkflowDefinition, fast: bool = False
+    ) -> WorkflowValidation:
+        """Validate workflow structure and connections.
+
+        With ``fast``, stop after the entry/output checks if either fails;
+        the remaining rules are meaningless without both.
+        """
+        return self._prepare(workflow, fast)[1]
+
+    def _prepare(
+        self, workflow: WorkflowDefinition, fast: bool = False
+    ) -> Tuple[GraphIndex, WorkflowValidation]:
+        """Index and validate a workflow, memoized by its definition.
+
+        Replaying a saved workflow with a new query skips both steps. The
+        key covers the whole definition, since the index carries node configs.
+        Fast validations that bailed out early are partial and not cached.
+        """
+        key = hashlib.blake2b(
+            workflow.model_dump_json().encode(), digest_size=16
+        ).digest()
+        cached = self._graph_cache.get(key)
+        if cached is not None:
+            self._graph_cache.move_to_end(key)
+            return cached
+
+        index = _build_graph(workflow)
+        validation = self._validate(workflow, index, fast)
+        prepared = (index, validation)
+        if fast and not validation.valid:
+            return prepared
+        self._graph_cache[key] = prepared
+        if len(self._graph_cache) > GRAPH_CACHE_SIZE:
+            self._graph_cache.popitem(last=False)
+        return prepared
+
+    def _validate(
+        self, workflow: WorkflowDefinition, index: GraphIndex, fast: bool = False
+    ) -> WorkflowValidation:
+        """Validate a workflow against its prebuilt graph index."""
         errors = []
         nodes = workflow.nodes
-        edges = workflow.edges
-
-        # Create lookup maps
-        node_map = {node.id: node for node in nodes}
-        node_types = [node.data.type for node in nodes]
+        type_counts = index.type_counts
 
         # Rule 1: Must have exactly one User Query node
-        user_query_count = node_types.count("userQuery")
+        user_query_count = type_counts["userQuery"]
         if user_query_count == 0:
             errors.append(ValidationError(
                 code="MISSING_USER_QUERY",
@@ -44,7 +146,7 @@ class WorkflowExecutor:
             ))
 
         # Rule 2: Must have exactly one Output node
-        output_count = node_types.count("output")
+        output_count = type_counts["output"]
         if output_count == 0:
             errors.append(ValidationError(
                 code="MISSING_OUTPUT",
@@ -56,50 +158,50 @@ class WorkflowExecutor:
                 message="Workflow can only have one Output component"
             ))
 
+        if fast and errors:
+            return WorkflowValidation(valid=False, errors=errors)
+
         # Rule 3: Must have at least one processing node (LLM or KnowledgeBase)
-        has_llm = "llmEngine" in node_types
-        has_kb = "knowledgeBase" in node_types
-        if not has_llm and not has_kb:
+        if not type_counts["llmEngine"] and not type_counts["knowledgeBase"]:
             errors.append(ValidationError(
                 code="NO_PROCESSING",
                 message="Workflow must have at least one LLM Engine or Knowledge Base component"
             ))
 
-        # Build adjacency lists
-        outgoing = defaultdict(list)
-        incoming = defaultdict(list)
-        for edge in edges:
-            outgoing[edge.source].append(edge.target)
-            incoming[edge.target].append(edge.source)
+        # Nodes are only indexed as sources/targets once an edge touches them
+        has_outgoing = set(index.outgoing)
+        has_incoming = set(index.incoming)
 
         # Rule 4: Check all nodes are connected
         for node in nodes:
-            if node.data.type == "userQuery":
-                if not outgoing.get(node.id):
+            # Read each node's fields once; these are pydantic attribute chains
+            node_id, node_type = node.id, node.data.type
+            if node_type == "userQuery":
+                if node_id not in has_outgoing:
                     errors.append(ValidationError(
                         code="DISCONNECTED_USER_QUERY",
                         message="User Query must be connected to next component",
-                        node_id=node.id
+                        node_id=node_id
                     ))
-            elif node.data.type == "output":
-                if not incoming.get(node.id):
+            elif node_type == "output":
+                if node_id not in has_incoming:
                     errors.append(ValidationError(
                         code="DISCONNECTED_OUTPUT",
                         message="Output must receive input from a component",
-                        node_id=node.id
+                        node_id=node_id
                     ))
             else:
                 # Middle nodes should have both incoming and outgoing
-                if not incoming.get(node.id) and not outgoing.get(node.id):
+                if node_id not in has_incoming and node_id not in has_outgoing:
                     errors.append(ValidationError(
                         code="ORPHAN_NODE",
                         message=f"Component '{node.data.label}' is not connected",
-                        node_id=node.id
+                        node_id=node_id
                     ))
 
-        # Rule 5: Check for cycles (using DFS)
+        # Rule 5: Check for cycles
         if not errors:  # Only check if basic structure is valid
-            has_cycle = self._detect_cycle(nodes, edges)
+            has_cycle = self._detect_cycle(index)
             if has_cycle:
                 errors.append(ValidationError(
                     code="CYCLE_DETECTED",
@@ -111,76 +213,84 @@ class WorkflowExecutor:
             errors=errors
         )
 
-    def _detect_cycle(self, nodes: List, edges: List) -> bool:
-        """Detect cycles using DFS."""
-        graph = defaultdict(list)
-        for edge in edges:
-            graph[edge.source].append(edge.target)
-
-        visited = set()
-        rec_stack = set()
-
-        def dfs(node_id: str) -> bool:
-            visited.add(node_id)
-            rec_stack.add(node_id)
-
-            for neighbor in graph.get(node_id, []):
-                if neighbor not in visited:
-                    if dfs(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-
-            rec_stack.remove(node_id)
-            return False
-
-        for node in nodes:
-            if node.id not in visited:
-                if dfs(node.id):
-                    return True
-
-        return False
-
-    def _topological_sort(self, nodes: List, edges: List) -> List:
-        """Sort nodes in execution order using topological sort."""
-        graph = defaultdict(list)
-        in_degree = defaultdict(int)
-
-        node_map = {node.id: node for node in nodes}
-
-        for node in nodes:
-            in_degree[node.id] = 0
-
-        for edge in edges:
-            graph[edge.source].append(edge.target)
-            in_degree[edge.target] += 1
-
-        # Find starting nodes (in_degree = 0)
-        queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
-        sorted_nodes = []
-
-        while queue:
-            node_id = queue.pop(0)
-            sorted_nodes.append(node_map[node_id])
+    def _detect_cycle(self, index: GraphIndex) -> bool:
+        """Detect cycles with Kahn's algorithm.
+
+        Nodes are peeled off as their in-degree drops to zero; anything
+        left over sits on a cycle. Unlike a DFS this keeps no path state.
+        """
+        outgoing = index.outgoing
+        remaining = dict(index.in_degree)
+        ready = [node_id for node_id, degree in remaining.items() if degree == 0]
+        # Edges from unknown ids still feed their targets
+        ready.extend(source for source in outgoing if source not in remaining)
+        total = len(ready) + sum(1 for degree in remaining.values() if degree)
+
+        peeled = 0
+        while ready:
+            peeled += 1
+            for target in outgoing.get(ready.pop(), ()):
+                remaining[target] -= 1
+                if remaining[target] == 0:
+                    ready.append(target)
+
+        return peeled < total
 
-            for neighbor in graph[node_id]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+    async def execute(
+        self,
+        workflow: WorkflowDefinition,
+        user_query: str,
+    ) -> WorkflowExecuteResponse:
+        """Execute the workflow with the given query.
 
-        return sorted_nodes
+        Each node starts as soon as all of its inputs are ready, so
+        independent branches run concurrently.
+        """
+        return await self._execute(workflow, user_query)
 
-    async def execute(
+    async def execute_stream(
+        self,
+        workflow: WorkflowDefinition,
+        user_query: str,
+    ) -> AsyncIterator[WorkflowEvent]:
+        """Execute the workflow, yielding events as it progresses.
+
+        Finished steps and LLM tokens are yielded as they happen, ending
+        with a ``result`` event. Closing the iterator early (e.g. when the
+        client disconnects) cancels the execution.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run():
+            try:
+                result = await self._execute(workflow, user_query, events)
+            except Exception as e:
+                result = WorkflowExecuteResponse(success=False, error=str(e))
+            events.put_nowait(WorkflowEvent(event="result", result=result))
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if event.event == "result":
+                    return
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _execute(
         self,
         workflow: WorkflowDefinition,
         user_query: str,
+        events: Optional[asyncio.Queue] = None,
     ) -> WorkflowExecuteResponse:
-        """Execute the workflow with the given query."""
-        start_time = time.time()
+        """Execute the workflow, publishing progress to ``events`` if given."""
+        start_time = time.perf_counter_ns()
         steps = []
 
         # Validate first
-        validation = self.validate_workflow(workflow)
+        index, validation = self._prepare(workflow, fast=True)
         if not validation.valid:
             return WorkflowExecuteResponse(
                 success=False,
@@ -191,58 +301,16 @@ class WorkflowExecutor:
             )
 
         try:
-            # Sort nodes in execution order
-            sorted_nodes = self._topological_sort(workflow.nodes, workflow.edges)
-
-            # Build edge map for data passing
-            edge_map = {}
-            for edge in workflow.edges:
-                if edge.target not in edge_map:
-                    edge_map[edge.target] = []
-                edge_map[edge.target].append(edge.source)
-
-            # Context for passing data between nodes
-            node_outputs = {}
-            final_response = None
+            node_outputs = await self._execute_dag(index, user_query, steps, events)
 
-            # Execute each node in order
-            for node in sorted_nodes:
-                step_start = time.time()
-                step = ExecutionStep(
-                    node_id=node.id,
-                    node_type=node.data.type,
-                    status="running",
-                )
-
-                try:
-                    # Gather inputs from connected nodes
-                    inputs = {"query": user_query}
-                    for source_id in edge_map.get(node.id, []):
-                        if source_id in node_outputs:
-                            inputs.update(node_outputs[source_id])
-
-                    # Execute based on node type
-                    output = await self._execute_node(node, inputs)
-                    node_outputs[node.id] = output
-
-                    step.status = "completed"
-                    step.output = output
-                    step.duration_ms = int((time.time() - step_start) * 1000)
-
-                    # Capture final response from output node
-                    if node.data.type == "output":
-                        final_response = output.get("response", output.get("context", ""))
-
-                except Exception as e:
-                    step.status = "error"
-                    step.error = str(e)
-                    step.duration_ms = int((time.time() - step_start) * 1000)
-                    steps.append(step)
-                    raise
-
-                steps.append(step)
+            # Capture final response from output node
+            final_response = None
+            for node in workflow.nodes:
+                if node.data.type == "output":
+                    output = node_outputs[node.id]
+                    final_response = output.get("response", output.get("context", ""))
 
-            total_duration = int((time.time() - start_time) * 1000)
+            total_duration = (time.perf_counter_ns() - start_time) // 1_000_000
 
             return WorkflowExecuteResponse(
                 success=True,
@@ -252,7 +320,7 @@ class WorkflowExecutor:
             )
 
         except Exception as e:
-            total_duration = int((time.time() - start_time) * 1000)
+            total_duration = (time.perf_counter_ns() - start_time) // 1_000_000
             return WorkflowExecuteResponse(
                 success=False,
                 error=str(e),
@@ -260,25 +328,196 @@ class WorkflowExecutor:
                 total_duration_ms=total_duration,
             )
 
-    async def _execute_node(self, node, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single node."""
-        node_type = node.data.type
-        config = node.data.config or {}
+    async def _execute_dag(
+        self,
+        index: GraphIndex,
+        user_query: str,
+        steps: List[ExecutionStep],
+        events: Optional[asyncio.Queue] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run the workflow graph, scheduling each node once its inputs finish.
+
+        Completed steps are appended to ``steps`` in completion order and
+        published to ``events``.
+        Raises RuntimeError with the first failed step's error; nodes still
+        running at that point are cancelled.
+        """
+        node_map = index.node_map
+        in_degree = dict(index.in_degree)
+        node_outputs = {}
+        memo: Dict[tuple, asyncio.Future] = {}
+        semaphore = asyncio.Semaphore(settings.WORKFLOW_MAX_PARALLEL_NODES)
+
+        def start(node) -> asyncio.Task:
+            return asyncio.create_task(
+                self._run_node(
+                    node, index.incoming, node_outputs, user_query, semaphore, memo, events
+                )
+            )
 
-        if node_type == "userQuery":
-            return {"query": inputs.get("query", "")}
+        # Web searches only need the user query, so start them before the
+        # upstream nodes they wait on have finished
+        for node in node_map.values():
+            config = node.data.config
+            if node.data.type == "llmEngine" and config and config.use_web_search:
+                self._start_web_search(
+                    memo, user_query, config.web_search_provider or "serpapi"
+                )
+
+        running = {
+            start(node): node
+            for node_id, node in node_map.items()
+            if in_degree[node_id] == 0
+        }
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node = running.pop(task)
+                    step = task.result()
+                    steps.append(step)
+                    if events is not None:
+                        events.put_nowait(WorkflowEvent(event="step", step=step))
+                    if step.status == "error":
+                        raise RuntimeError(step.error)
+
+                    # Unlock successors whose inputs are now all available
+                    for target in index.outgoing.get(node.id, ()):
+                        in_degree[target] -= 1
+                        if in_degree[target] == 0:
+                            running[start(node_map[target])] = node_map[target]
+        finally:
+            pending = [*running, *memo.values()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return node_outputs
+
+    async def _run_node(
+        self,
+        node,
+        incoming: Dict[str, List[str]],
+        node_outputs: Dict[str, Dict[str, Any]],
+        user_query: str,
+        semaphore: asyncio.Semaphore,
+        memo: Dict[tuple, asyncio.Future],
+        events: Optional[asyncio.Queue] = None,
+    ) -> ExecutionStep:
+        """Run one node and record its output; errors are reported on the step."""
+        step = ExecutionStep(
+            node_id=node.id,
+            node_type=node.data.type,
+            status="running",
+        )
 
-        elif node_type == "knowledgeBase":
-            query = inputs.get("query", "")
-            document_ids = config.documents if config.documents else None
-            top_k = config.top_k or 5
-            embedding_model = config.embedding_model or "openai"
+        async with semaphore:
+            step_start = time.perf_counter_ns()
+            try:
+                # Gather inputs from connected nodes
+                inputs = {"query": user_query}
+                for source_id in incoming.get(node.id, ()):
+                    if source_id in node_outputs:
+                        inputs.update(node_outputs[source_id])
+
+                # Execute based on node type
+                output = await asyncio.wait_for(
+                    self._execute_node(node, inputs, memo, events),
+                    timeout=settings.WORKFLOW_NODE_TIMEOUT,
+                )
+                node_outputs[node.id] = output
 
-            results = await self.embedding_service.search_similar(
-                query=query,
+                step.status = "completed"
+                step.output = output
+
+            except asyncio.TimeoutError:
+                step.status = "error"
+                step.error = (
+                    f"Component '{node.data.label}' timed out after "
+                    f"{settings.WORKFLOW_NODE_TIMEOUT}s"
+                )
+
+            except Exception as e:
+                step.status = "error"
+                step.error = str(e)
+
+            step.duration_ms = (time.perf_counter_ns() - step_start) // 1_000_000
+
+        return step
+
+    @staticmethod
+    def _start_shared(
+        memo: Dict[tuple, asyncio.Future], key: tuple, factory
+    ) -> asyncio.Future:
+        """Start ``factory()`` once per key within an execution."""
+        future = memo.get(key)
+        if future is None:
+            future = memo[key] = asyncio.ensure_future(factory())
+        return future
+
+    async def _shared(self, memo: Dict[tuple, asyncio.Future], key: tuple, factory):
+        """Await work shared within an execution, starting it if needed.
+
+        The shield keeps one caller's timeout from cancelling the work for
+        the others.
+        """
+        return await asyncio.shield(self._start_shared(memo, key, factory))
+
+    def _start_web_search(
+        self, memo: Dict[tuple, asyncio.Future], query: str, provider: str
+    ) -> asyncio.Future:
+        """Start (or join) the web search for a query."""
+        async def search():
+            async with _provider_slot(provider):
+                return await self.search_service.search(
+                    query=query,
+                    num_results=5,
+                    provider=provider,
+                )
+
+        return self._start_shared(memo, ("web_search", provider, query), search)
+
+    async def _execute_node(
+        self,
+        node,
+        inputs: Dict[str, Any],
+        memo: Dict[tuple, asyncio.Future],
+        events: Optional[asyncio.Queue] = None,
+    ) -> Dict[str, Any]:
+        """Execute a single node with the handler for its type.
+
+        ``memo`` holds work shared between nodes of the same execution.
+        LLM output is streamed to ``events`` as tokens when given.
+        """
+        try:
+            handler = self._node_handlers[node.data.type]
+        except KeyError:
+            raise ValueError(f"Unknown node type: {node.data.type}") from None
+        return await handler(node, inputs, memo, events)
+
+    async def _exec_user_query(self, node, inputs, memo, events) -> Dict[str, Any]:
+        return {"query": inputs.get("query", "")}
+
+    async def _exec_knowledge_base(self, node, inputs, memo, events) -> Dict[str, Any]:
+        config = node.data.config or {}
+        query = inputs.get("query", "")
+        document_ids = config.documents if config.documents else None
+        top_k = config.top_k or 5
+        embedding_model = config.embedding_model or "openai"
+
+        # Knowledge bases on the same model and query embed it once
+        async def embed_query():
+            async with _provider_slot(embedding_model):
+                return await self.embedding_service.embed_query(query, embedding_model)
+
+        async def search():
+            query_embedding = await self._shared(
+                memo, ("embedding", embedding_model, query), embed_query
+            )
+            results = await self.embedding_service.search_with_vector(
+                query_embedding,
                 document_ids=document_ids,
                 top_k=top_k,
-                model=embedding_model,
             )
 
             # Format context from results
@@ -286,59 +525,86 @@ class WorkflowExecutor:
                 f"[From {r['document_name']}]:\n{r['content']}"
                 for r in results
             ])
+            return context, results
+
+        # Identical knowledge bases in one execution search once
+        context, results = await self._shared(
+            memo,
+            (
+                "knowledge",
+                embedding_model,
+                query,
+                tuple(sorted(document_ids)) if document_ids else None,
+                top_k,
+            ),
+            search,
+        )
 
-            return {
-                "query": query,
-                "context": context,
-                "search_results": results,
-            }
+        return {
+            "query": query,
+            "context": context,
+            "search_results": results,
+        }
 
-        elif node_type == "llmEngine":
-            query = inputs.get("query", "")
-            context = inputs.get("context", "")
+    async def _exec_llm_engine(self, node, inputs, memo, events) -> Dict[str, Any]:
+        config = node.data.config or {}
+        query = inputs.get("query", "")
+        context = inputs.get("context", "")
+
+        # Add web search results if enabled
+        if config.use_web_search:
+            # Usually already running since the execution started
+            search_results = await asyncio.shield(self._start_web_search(
+                memo, query, config.web_search_provider or "serpapi"
+            ))
+            if search_results["success"]:
+                web_context = self.search_service.format_search_results_as_context(
+                    search_results["results"]
+                )
+                context = f"{context}\n\n{web_context}" if context else web_context
 
-            # Add web search results if enabled
-            if config.use_web_search:
-                search_results = await self.search_service.search(
-                    query=query,
-                    num_results=5,
-                    provider=config.web_search_provider or "serpapi",
+        on_token = None
+        if events is not None:
+            def on_token(delta: str):
+                events.put_nowait(
+                    WorkflowEvent(event="token", node_id=node.id, delta=delta)
                 )
-                if search_results["success"]:
-                    web_context = self.search_service.format_search_results_as_context(
-                        search_results["results"]
-                    )
-                    context = f"{context}\n\n{web_context}" if context else web_context
 
-            # Call LLM
+        # Call LLM
+        provider = config.provider or "openai"
+        async with _provider_slot(provider):
             result = await self.llm_service.generate(
                 query=query,
                 context=context if context else None,
                 system_prompt=config.system_prompt,
-                provider=config.provider or "openai",
+                provider=provider,
                 model=config.model,
                 temperature=config.temperature or 0.7,
+                on_token=on_token,
             )
 
-            if result["success"]:
-                return {
-                    "query": query,
-                    "response": result["response"],
-                    "llm_metadata": {
-                        "provider": result["provider"],
-                        "model": result["model"],
-                        "usage": result.get("usage"),
-                    },
-                }
-            else:
-                raise Exception(f"LLM Error: {result.get('error')}")
-
-        elif node_type == "output":
-            # Pass through the response
+        if result["success"]:
             return {
-                "response": inputs.get("response", inputs.get("context", "")),
-                "query": inputs.get("query", ""),
+                "query": query,
+                "response": result["response"],
+                "llm_metadata": {
+                    "provider": result["provider"],
+                    "model": result["model"],
+                    "usage": result.get("usage"),
+                },
             }
-
         else:
-            raise ValueError(f"Unknown node type: {node_type}")
+            raise Exception(f"LLM Error: {result.get('error')}")
+
+    async def _exec_output(self, node, inputs, memo, events) -> Dict[str, Any]:
+        # Pass through the response
+        return {
+            "response": inputs.get("response", inputs.get("context", "")),
+            "query": inputs.get("query", ""),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_workflow_executor() -> WorkflowExecutor:
+    """Get the shared workflow executor instance."""
+    return WorkflowExecutor()
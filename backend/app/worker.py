@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+from celery import Celery
+from celery.signals import worker_shutdown
+from kombu import Queue
+
+from app.core.cache import close_redis, invalidate
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, engine
+from app.services import close_services
+from app.services.document import DocumentService, shutdown_extract_pool
+from app.services.embedding import get_embedding_service
+
+celery_app = Celery("planet_ai", broker=settings.REDIS_URL)
+
+celery_app.conf.update(
+    # Processing can be re-run from the document's DB status, so the
+    # queue does not need to survive a broker restart.
+    task_queues=(Queue("documents", routing_key="documents", durable=False),),
+    task_default_queue="documents",
+    task_ignore_result=True,
+    worker_prefetch_multiplier=1,
+)
+
+
+async def run_document_processing(document_id: str):
+    """Process a document in its own database session."""
+    async with AsyncSessionLocal() as db:
+        service = DocumentService(db, get_embedding_service())
+        try:
+            await service.process_document(uuid.UUID(document_id))
+        except Exception as e:
+            print(f"Error processing document {document_id}: {e}")
+        finally:
+            await invalidate("list_documents", "knowledge", f"knowledge:{document_id}")
+
+
+async def _run_in_worker(document_id: str):
+    try:
+        await run_document_processing(document_id)
+    finally:
+        # Each task runs on a fresh event loop; drop connections bound to it
+        await engine.dispose()
+        await close_redis()
+        await close_services()
+
+
+@worker_shutdown.connect
+def _shutdown_extract_pool(**kwargs):
+    """Stop extraction processes started by non-prefork (e.g. solo) workers."""
+    shutdown_extract_pool()
+
+
+@celery_app.task(name="documents.process", queue="documents")
+def process_document_task(document_id: str):
+    """Celery task to process an uploaded document."""
+    asyncio.run(_run_in_worker(document_id))
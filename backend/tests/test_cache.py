@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+from app.core import cache
+
+
+def test_unresponsive_redis_is_a_cache_miss(monkeypatch):
+    async def run():
+        # Accepts connections but never answers, like a partitioned server
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(cache.settings, "REDIS_URL", f"redis://127.0.0.1:{port}/0")
+        try:
+            start = time.perf_counter()
+            value = await cache.cache_get("key")
+            await cache.invalidate("tag")
+            elapsed = time.perf_counter() - start
+        finally:
+            await cache.close_redis()
+            server.close()
+        return value, elapsed
+
+    value, elapsed = asyncio.run(run())
+    assert value is None
+    assert elapsed < 4 * cache.settings.REDIS_TIMEOUT
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.db.database import get_db
+from app.main import app
+
+
+class RecordingSession:
+    """Stands in for the DB session, keeping the statements it is given."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def stream_scalars(self, stmt):
+        self.statements.append(stmt)
+
+        async def rows():
+            return
+            yield
+
+        return rows()
+
+
+def test_history_accepts_utc_cursor():
+    session = RecordingSession()
+    app.dependency_overrides[get_db] = lambda: session
+    try:
+        response = TestClient(app).get(
+            "/api/v1/chat/sessions/abc", params={"before": "2030-01-01T00:00:00Z"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert response.status_code == 200
+    assert response.json()["messages"] == []
+
+    params = session.statements[0].compile(dialect=postgresql.asyncpg.dialect()).params
+    cursors = [value for value in params.values() if isinstance(value, datetime)]
+    assert cursors == [datetime(2030, 1, 1)]
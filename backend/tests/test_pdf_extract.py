@@ -0,0 +1,47 @@
+import os
+import signal
+
+import fitz
+import pytest
+
+from app.services import document
+from app.services.document import DocumentService, PARALLEL_EXTRACT_MIN_PAGES
+
+
+@pytest.fixture
+def large_pdf(tmp_path):
+    path = tmp_path / "large.pdf"
+    with fitz.open() as doc:
+        for i in range(PARALLEL_EXTRACT_MIN_PAGES + 4):
+            doc.new_page().insert_text((72, 72), f"page {i}")
+        doc.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def two_workers(monkeypatch):
+    monkeypatch.setattr(document, "_extract_worker_count", lambda: 2)
+    yield
+    document.shutdown_extract_pool()
+
+
+def _extract(file_path):
+    return DocumentService(db=None, embedding_service=None)._extract_text(file_path)
+
+
+def test_large_pdf_recovers_from_broken_pool(large_pdf, two_workers):
+    assert "page 35" in _extract(large_pdf)
+    pool = document._extract_pool
+    assert pool is not None
+
+    # Simulate an OOM kill of the extraction workers
+    for pid in list(pool._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    text = _extract(large_pdf)
+    assert "page 0" in text and "page 35" in text
+    assert document._extract_pool is not pool
+
+    # A fresh pool is started for the next large PDF
+    assert "page 35" in _extract(large_pdf)
+    assert document._extract_pool is not None
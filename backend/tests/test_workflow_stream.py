@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+
+from app.main import app
+from app.schemas.workflow import ExecutionStep, WorkflowEvent, WorkflowExecuteResponse
+from app.services.workflow import get_workflow_executor
+
+RUN_SECONDS = 0.5
+
+REQUEST_BODY = json.dumps({
+    "workflow": {"nodes": [], "edges": []},
+    "query": "hello",
+}).encode()
+
+
+class SlowExecutor:
+    """Emits one step right away and finishes the run after a delay."""
+
+    async def execute_stream(self, workflow, user_query):
+        yield WorkflowEvent(
+            event="step",
+            step=ExecutionStep(node_id="uq", node_type="userQuery", status="completed"),
+        )
+        await asyncio.sleep(RUN_SECONDS)
+        yield WorkflowEvent(
+            event="result",
+            result=WorkflowExecuteResponse(success=True, response="done"),
+        )
+
+
+async def _stream(headers):
+    """Call the streaming route over ASGI, timing each body chunk sent."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/workflows/execute/stream",
+        "raw_path": b"/api/v1/workflows/execute/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    body_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": REQUEST_BODY, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    start = time.perf_counter()
+    response_headers = {}
+    chunks = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response_headers.update(
+                (k.decode(), v.decode()) for k, v in message["headers"]
+            )
+        elif message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+
+    app.dependency_overrides[get_workflow_executor] = SlowExecutor
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+        app.dependency_overrides.pop(get_workflow_executor, None)
+    return response_headers, chunks
+
+
+def test_stream_events_arrive_before_run_finishes_with_gzip():
+    headers, chunks = asyncio.run(_stream([(b"accept-encoding", b"gzip")]))
+
+    assert headers["content-encoding"] != "gzip"
+    first_at, first_chunk = chunks[0]
+    assert first_at < RUN_SECONDS / 2
+    assert json.loads(first_chunk)["event"] == "step"
+    assert json.loads(chunks[-1][1])["event"] == "result"
@@ -66,8 +66,19 @@ export const documentApi = {
   },
 
   list: async (): Promise<{ documents: Document[]; total: number }> => {
-    const response = await api.get('/documents');
-    return response.data;
+    // The API pages documents (at most 200 per request); fetch every page
+    const pageSize = 200;
+    const documents: Document[] = [];
+    let total = 0;
+    do {
+      const response = await api.get('/documents', {
+        params: { limit: pageSize, offset: documents.length },
+      });
+      documents.push(...response.data.documents);
+      total = response.data.total;
+      if (response.data.documents.length === 0) break;
+    } while (documents.length < total);
+    return { documents, total };
   },
 
   get: async (id: string): Promise<Document> => {